@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+A loopback benchmark for ground station discovery.
+
+Each trial starts a receiver (a `DiscoveryResponder` plus a control socket on
+a random port) and a transmitter (which only knows the discovery group) in
+two separate processes at the same moment. The time until the first control
+packet arrives at the receiver is reported. No controller or uinput device
+is needed.
+
+Usage:
+    python3 bench_discovery.py
+    python3 bench_discovery.py --interface 192.168.1.10   # a real interface
+"""
+
+import sys
+import time
+import socket
+import struct
+import argparse
+import multiprocessing
+
+from discovery import DiscoveryResponder, discover_ground_station
+
+# --- Configuration Constants ---
+PACKET_FORMAT = "!LhhhhhhBBBBBBBBBBBQ"
+BUFFER_SIZE = 1024
+TRIAL_TIMEOUT_SEC = 5.0
+
+def receiver(go, interface_ip, result):
+    """Announces itself and waits for the first control packet."""
+    go.wait()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((interface_ip if interface_ip != "0.0.0.0" else "", 0))
+    sock.settimeout(TRIAL_TIMEOUT_SEC)
+    responder = DiscoveryResponder(sock.getsockname()[1], interface_ip=interface_ip)
+    responder.start()
+
+    try:
+        sock.recv(BUFFER_SIZE)
+        result.value = time.monotonic()
+    except socket.timeout:
+        pass
+    finally:
+        responder.close()
+        sock.close()
+
+def transmitter(go, interface_ip):
+    """Discovers the receiver and sends it one control packet."""
+    go.wait()
+    found = discover_ground_station(TRIAL_TIMEOUT_SEC, interface_ip=interface_ip)
+    if found is None:
+        return
+
+    destination = found[0]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.sendto(struct.pack(PACKET_FORMAT, 0, *[0] * 6, *[0] * 10, 0, 0), destination)
+    sock.close()
+
+def run_trial(interface_ip):
+    """
+    Runs one trial.
+
+    Returns:
+        float: Seconds from start to the first packet, or None on failure.
+    """
+    go = multiprocessing.Event()
+    result = multiprocessing.Value("d", 0.0)
+    processes = [
+        multiprocessing.Process(target=receiver, args=(go, interface_ip, result)),
+        multiprocessing.Process(target=transmitter, args=(go, interface_ip)),
+    ]
+    for process in processes:
+        process.start()
+
+    # Give both processes time to finish importing before starting the clock.
+    time.sleep(0.2)
+    start = time.monotonic()
+    go.set()
+    for process in processes:
+        process.join(TRIAL_TIMEOUT_SEC + 1)
+
+    if result.value == 0.0:
+        return None
+    return result.value - start
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Discovery time-to-first-packet benchmark")
+    parser.add_argument("--trials", type=int, default=10, help="number of trials")
+    parser.add_argument("--interface", default="127.0.0.1",
+                        help="local interface IP for the multicast traffic")
+    args = parser.parse_args()
+
+    times = []
+    for _ in range(args.trials):
+        elapsed = run_trial(args.interface)
+        if elapsed is None:
+            print("Error: trial failed, no packet received.")
+            sys.exit(1)
+        times.append(elapsed)
+
+    times.sort()
+    print(f"Start to first packet over {args.trials} trials: "
+          f"min {times[0] * 1000:.1f} ms, "
+          f"median {times[len(times) // 2] * 1000:.1f} ms, "
+          f"max {times[-1] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
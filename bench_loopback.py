@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+A loopback benchmark for the UDP control link.
+
+It runs a transmitter loop and an echo receiver in two separate processes on
+127.0.0.1, using the same packet format as `read_deck.py`. No controller or
+uinput device is needed. For every packet the round-trip time is measured,
+and the worst stall of the transmitter loop is reported at the end.
+
+Usage:
+    python3 bench_loopback.py                 # normal scheduling
+    sudo python3 bench_loopback.py --realtime # with realtime.py tuning
+"""
+
+import sys
+import time
+import socket
+import struct
+import argparse
+import multiprocessing
+
+from realtime import enable_realtime, StallMonitor
+
+# --- Configuration Constants ---
+BENCH_IP = "127.0.0.1"
+BENCH_PORT = 5104
+PACKET_FORMAT = "!LhhhhhhBBBBBBBBBBBQ"
+PACKET_SIZE = struct.calcsize(PACKET_FORMAT)
+BUFFER_SIZE = 1024
+
+def echo_receiver(ready, realtime, cpu):
+    """Receives packets and sends them straight back to the sender."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((BENCH_IP, BENCH_PORT))
+    if realtime:
+        enable_realtime(cpu)
+    ready.set()
+
+    try:
+        while True:
+            data, addr = sock.recvfrom(BUFFER_SIZE)
+            if not data:
+                break
+            if len(data) == PACKET_SIZE:
+                sock.sendto(data, addr)
+    finally:
+        sock.close()
+
+def percentile(sorted_values, fraction):
+    """Returns the value at the given fraction of a sorted list."""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def run_sender(count, rate_hz, realtime, cpu):
+    """
+    Sends `count` packets at `rate_hz` and waits for each echo.
+
+    Returns:
+        tuple: (list of round-trip times in seconds, StallMonitor, lost count)
+    """
+    delay_sec = 1 / rate_hz
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    axes = [0] * 6
+    buttons = [0] * 10
+    flags = 0
+    rtts = []
+    lost = 0
+    stall_monitor = StallMonitor(delay_sec)
+
+    if realtime:
+        enable_realtime(cpu)
+
+    for seq in range(count):
+        stall_monitor.tick()
+        axes[0] = seq & 0x7FFF
+        message = struct.pack(PACKET_FORMAT, seq, *axes, *buttons, flags, 0)
+
+        start = time.perf_counter()
+        sock.sendto(message, (BENCH_IP, BENCH_PORT))
+        deadline = start + delay_sec
+        try:
+            # Late echoes of earlier packets may still be queued; skip them
+            # so one stall does not shift every later reply.
+            while True:
+                sock.settimeout(max(deadline - time.perf_counter(), 1e-6))
+                reply = sock.recv(BUFFER_SIZE)
+                if struct.unpack(PACKET_FORMAT, reply)[0] == seq:
+                    rtts.append(time.perf_counter() - start)
+                    break
+        except socket.timeout:
+            lost += 1
+
+        time.sleep(delay_sec)
+
+    # An empty datagram tells the echo receiver to stop.
+    sock.sendto(b"", (BENCH_IP, BENCH_PORT))
+    sock.close()
+    return rtts, stall_monitor, lost
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="UDP loopback latency benchmark")
+    parser.add_argument("--count", type=int, default=2000, help="packets to send")
+    parser.add_argument("--rate", type=float, default=100, help="send rate in Hz")
+    parser.add_argument("--realtime", action="store_true",
+                        help="enable CPU pinning, SCHED_FIFO, mlockall and GC freeze")
+    parser.add_argument("--cpu", type=int, default=2,
+                        help="core for the sender (the receiver uses the next one)")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    receiver = multiprocessing.Process(
+        target=echo_receiver, args=(ready, args.realtime, args.cpu + 1), daemon=True)
+    receiver.start()
+    if not ready.wait(5):
+        print("Error: echo receiver did not start.")
+        sys.exit(1)
+
+    try:
+        rtts, stall_monitor, lost = run_sender(args.count, args.rate, args.realtime, args.cpu)
+    except KeyboardInterrupt:
+        print("\nBenchmark interrupted.")
+        sys.exit(1)
+    finally:
+        receiver.join(1)
+
+    if not rtts:
+        print("Error: no packets came back.")
+        sys.exit(1)
+
+    rtts.sort()
+    print(f"Mode: {'real-time' if args.realtime else 'normal'}, "
+          f"{args.count} packets at {args.rate:g} Hz, {lost} lost")
+    print(f"RTT p50: {percentile(rtts, 0.50) * 1e6:.1f} us, "
+          f"p99: {percentile(rtts, 0.99) * 1e6:.1f} us, "
+          f"max: {rtts[-1] * 1e6:.1f} us")
+    print(stall_monitor.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""
+A startup-time benchmark for the headless transmitter.
+
+It measures two things, each in a fresh Python interpreter:
+
+1. Import time of the modules `read_deck.py` depends on (and of `rich`, for
+   comparison with the dashboard).
+2. Start-to-first-packet time: `read_deck.py` is launched as a child process
+   and the time until its first UDP packet arrives is recorded.
+   A discovery responder is run so the time includes finding the ground
+   station. This needs root and a connected controller, like `read_deck.py`.
+
+Usage:
+    python3 bench_startup.py --imports-only
+    sudo python3 bench_startup.py
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import subprocess
+
+from discovery import DiscoveryResponder
+
+# --- Configuration Constants ---
+LISTEN_IP = "0.0.0.0"
+LISTEN_PORT = 5004
+BUFFER_SIZE = 1024
+FIRST_PACKET_TIMEOUT_SEC = 15.0
+
+IMPORT_TARGETS = ("sdl2", "steamdeck_input_api", "realtime", "packet_auth",
+                  "discovery", "rate_control", "rich.live")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def measure_import(module, runs):
+    """
+    Imports `module` in `runs` fresh interpreters.
+
+    Returns:
+        float: The best import time in seconds, or None if the import failed.
+    """
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", code], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def measure_first_packet():
+    """
+    Launches read_deck.py and waits for its first packet.
+
+    Returns:
+        float: Seconds from process launch to the first packet, or None.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((LISTEN_IP, LISTEN_PORT))
+    sock.settimeout(FIRST_PACKET_TIMEOUT_SEC)
+    responder = DiscoveryResponder(LISTEN_PORT, name="bench_startup")
+    responder.start()
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, "read_deck.py")],
+                               cwd=SCRIPT_DIR, stdout=subprocess.DEVNULL)
+    try:
+        sock.recv(BUFFER_SIZE)
+        return time.perf_counter() - start
+    except socket.timeout:
+        return None
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        responder.close()
+        sock.close()
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Headless startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="interpreters per import")
+    parser.add_argument("--imports-only", action="store_true",
+                        help="skip launching read_deck.py")
+    args = parser.parse_args()
+
+    print("Import time (best of {}):".format(args.runs))
+    for module in IMPORT_TARGETS:
+        elapsed = measure_import(module, args.runs)
+        if elapsed is None:
+            print(f"  {module:<22} import failed")
+        else:
+            print(f"  {module:<22} {elapsed * 1000:7.1f} ms")
+
+    if args.imports_only:
+        return
+
+    elapsed = measure_first_packet()
+    if elapsed is None:
+        print("Error: no packet received from read_deck.py.")
+        sys.exit(1)
+    print(f"Start to first packet: {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
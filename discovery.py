@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+"""
+Zero-configuration discovery of the ground station.
+
+The receiver runs a `DiscoveryResponder` that joins a multicast group and
+announces itself (its name and control port) to every transmitter that
+probes the group. The transmitter calls `discover_ground_station()`, which
+probes the group until at least one ground station answers, and picks the
+one with the lowest round-trip time. `GroundStationFinder` runs the same
+search in a background thread so it can overlap with other startup work.
+
+Discovery needs a link that carries multicast (or broadcast). VPNs such as
+Tailscale usually do not; set the receiver's address by hand there.
+
+If both ends share an authentication key (see `packet_auth.py`), probes and
+announcements are signed (in their own domain, so they can never pass as
+control packets), and a transmitter only pairs with ground stations that
+know the same key. Every probe carries a random nonce, so an old
+announcement cannot be replayed, and a signed announcement names the
+address it was sent from, so it cannot be relayed from another host.
+
+Message format (before the optional tag):
+    !4sBQH4s : magic, message type, nonce, control port, IPv4 address of the
+               ground station (zero in probes)
+    followed by the UTF-8 name of the ground station (announcements only)
+"""
+
+import time
+import socket
+import struct
+import secrets
+import threading
+
+from packet_auth import DOMAIN_DISCOVERY
+
+# --- Configuration Constants ---
+DISCOVERY_GROUP = "239.255.42.99"   # Multicast group (or a broadcast address)
+DISCOVERY_PORT = 5006
+DISCOVERY_INTERFACE_IP = "0.0.0.0"  # Local interface to use ("0.0.0.0" = default)
+PROBE_INTERVAL_SEC = 0.1            # Delay between probes while nobody answers
+COLLECT_WINDOW_SEC = 0.05           # Extra wait for slower ground stations
+BUFFER_SIZE = 1024
+
+MESSAGE_MAGIC = b"OHRC"
+MESSAGE_FORMAT = "!4sBQH4s"
+MESSAGE_SIZE = struct.calcsize(MESSAGE_FORMAT)
+MSG_PROBE = 1
+MSG_ANNOUNCE = 2
+
+def is_multicast(address):
+    """Returns True for addresses in 224.0.0.0/4."""
+    return 224 <= int(address.split(".")[0]) <= 239
+
+def _encode(msg_type, nonce, port, ip="0.0.0.0", name=b"", authenticator=None):
+    """Builds a discovery message, signed if an authenticator is given."""
+    message = struct.pack(MESSAGE_FORMAT, MESSAGE_MAGIC, msg_type, nonce, port,
+                          socket.inet_aton(ip)) + name
+    if authenticator:
+        message = authenticator.sign(message)
+    return message
+
+def _decode(message, authenticator=None):
+    """
+    Parses a discovery message.
+
+    Returns:
+        tuple: (msg_type, nonce, port, ip, name), or None if the message is not a
+        valid (and, if required, correctly signed) discovery message.
+    """
+    if authenticator:
+        if len(message) < MESSAGE_SIZE + authenticator.tag_size:
+            return None
+        message = authenticator.verify(message)
+        if message is None:
+            return None
+    if len(message) < MESSAGE_SIZE:
+        return None
+
+    magic, msg_type, nonce, port, ip = struct.unpack(MESSAGE_FORMAT, message[:MESSAGE_SIZE])
+    if magic != MESSAGE_MAGIC:
+        return None
+    name = message[MESSAGE_SIZE:].decode(errors="replace")
+    return msg_type, nonce, port, socket.inet_ntoa(ip), name
+
+def _local_ip_towards(addr):
+    """Returns the local address the kernel uses to reach `addr`."""
+    probe_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # Connecting a UDP socket only selects a route; nothing is sent.
+        probe_sock.connect(addr)
+        return probe_sock.getsockname()[0]
+    finally:
+        probe_sock.close()
+
+class DiscoveryResponder(threading.Thread):
+    """Answers discovery probes in the background on the receiver side."""
+
+    def __init__(self, control_port, name=None, authenticator=None,
+                 group=DISCOVERY_GROUP, port=DISCOVERY_PORT,
+                 interface_ip=DISCOVERY_INTERFACE_IP):
+        """
+        Args:
+            control_port (int): The UDP port the receiver listens on.
+            name (str): The name announced to transmitters (default: hostname).
+            authenticator (PacketAuthenticator): Signs and verifies messages.
+            group (str): The multicast group (or broadcast address) to join.
+            port (int): The discovery port.
+            interface_ip (str): The local interface to join the group on.
+        """
+        super().__init__(daemon=True)
+        self.control_port = control_port
+        self.station_name = (name or socket.gethostname()).encode()
+        self.authenticator = authenticator.for_domain(DOMAIN_DISCOVERY) if authenticator else None
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("", port))
+        if is_multicast(group):
+            membership = struct.pack("4s4s", socket.inet_aton(group),
+                                     socket.inet_aton(interface_ip))
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+
+    def run(self):
+        """Replies to every probe with an announcement, until closed."""
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(BUFFER_SIZE)
+            except OSError:
+                # The socket was closed
+                return
+
+            message = _decode(data, self.authenticator)
+            if message is None or message[0] != MSG_PROBE:
+                continue
+
+            try:
+                reply = _encode(MSG_ANNOUNCE, message[1], self.control_port,
+                                _local_ip_towards(addr), self.station_name,
+                                self.authenticator)
+                self._sock.sendto(reply, addr)
+            except OSError as e:
+                print(f"Error answering discovery probe: {e}")
+
+    def close(self):
+        """Stops answering probes."""
+        self._sock.close()
+
+def discover_ground_station(timeout=None, authenticator=None,
+                            group=DISCOVERY_GROUP, port=DISCOVERY_PORT,
+                            interface_ip=DISCOVERY_INTERFACE_IP):
+    """
+    Probes the discovery group until a ground station answers.
+
+    Args:
+        timeout (float): Give up after this many seconds (None = never).
+        authenticator (PacketAuthenticator): Signs and verifies messages.
+        group (str): The multicast group (or broadcast address) to probe.
+        port (int): The discovery port.
+        interface_ip (str): The local interface to send probes from.
+
+    Returns:
+        tuple: ((ip, control_port), name, rtt_sec) of the ground station with
+        the lowest round-trip time, or None if the timeout expired.
+    """
+    if authenticator:
+        authenticator = authenticator.for_domain(DOMAIN_DISCOVERY)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    if is_multicast(group):
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                        socket.inet_aton(interface_ip))
+
+    start = time.perf_counter()
+    sent_at = {}   # nonce -> send time of that probe
+    last_probe = None
+    best = None
+    collect_until = None
+
+    try:
+        while True:
+            now = time.perf_counter()
+            if collect_until is not None and now >= collect_until:
+                return best
+            if collect_until is None and timeout is not None and now - start >= timeout:
+                return None
+
+            # Probe again if nobody has answered yet.
+            if best is None and (last_probe is None or now - last_probe >= PROBE_INTERVAL_SEC):
+                # Random, so announcements from an earlier run cannot be replayed.
+                nonce = secrets.randbits(64)
+                sent_at[nonce] = now
+                last_probe = now
+                sock.sendto(_encode(MSG_PROBE, nonce, 0, authenticator=authenticator),
+                            (group, port))
+
+            wait = PROBE_INTERVAL_SEC if collect_until is None else collect_until - now
+            sock.settimeout(max(wait, 0.001))
+            try:
+                data, addr = sock.recvfrom(BUFFER_SIZE)
+            except socket.timeout:
+                continue
+
+            received_at = time.perf_counter()
+            message = _decode(data, authenticator)
+            if message is None or message[0] != MSG_ANNOUNCE or message[1] not in sent_at:
+                continue
+
+            msg_type, nonce, control_port, station_ip, name = message
+            # A signed announcement must come from the address it names.
+            if authenticator and station_ip != addr[0]:
+                continue
+            rtt = received_at - sent_at[nonce]
+            if best is None or rtt < best[2]:
+                best = ((addr[0], control_port), name, rtt)
+            if collect_until is None:
+                collect_until = received_at + COLLECT_WINDOW_SEC
+    finally:
+        sock.close()
+
+class GroundStationFinder(threading.Thread):
+    """Runs `discover_ground_station()` in the background."""
+
+    def __init__(self, timeout=None, authenticator=None, **kwargs):
+        """
+        Args:
+            timeout (float): Give up after this many seconds (None = never).
+            authenticator (PacketAuthenticator): Signs and verifies messages.
+            **kwargs: Passed on to `discover_ground_station()`.
+        """
+        super().__init__(daemon=True)
+        self.timeout = timeout
+        self.authenticator = authenticator
+        self.kwargs = kwargs
+        self.result = None
+
+    def run(self):
+        """Stores the result of the search in `result`."""
+        try:
+            self.result = discover_ground_station(self.timeout, self.authenticator, **self.kwargs)
+        except OSError as e:
+            print(f"Error during discovery: {e}")
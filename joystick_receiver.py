@@ -20,16 +20,50 @@ except ImportError:
     print("Please install it using: pip install python-uinput")
     sys.exit(1)
 
+from realtime import enable_realtime, StallMonitor
+from packet_auth import PacketAuthenticator, load_key, DOMAIN_LINK_REPORT
+from discovery import DiscoveryResponder
+
 # --- Network Configuration ---
 # The IP address to listen on. "0.0.0.0" means listen on all available interfaces.
 UDP_IP = "0.0.0.0"
 UDP_PORT = 5004
 BUFFER_SIZE = 1024  # Max size of the received message
+DISCOVERY_ENABLED = True  # Announce this ground station to transmitters
 
-PACKET_FORMAT = "!LhhhhhhBBBBBBBBBB"
+PACKET_FORMAT = "!LhhhhhhBBBBBBBBBBBQ"
 PACKET_SIZE = struct.calcsize(PACKET_FORMAT)
 
+# Flag bits
+FLAG_INPUT_LOST = 0x01  # The transmitter lost its controller
+FLAG_KEEPALIVE = 0x02   # Sent below the nominal rate; the gap before it is not a stall
+
+# Link report sent back to the transmitter for its adaptive rate control
+# L: Last sequence number received
+# L: Microseconds between receiving that packet and sending the report
+# H: Packets received since the previous report
+# H: Packets expected since the previous report
+FEEDBACK_FORMAT = "!LLHH"
+FEEDBACK_INTERVAL_SEC = 0.2
+
 TIMEOUT_SEC = 3.0  # For example
+RECV_TIMEOUT_SEC = 0.05  # How long a single recvfrom() may block
+# Nominal packet period of the transmitter (1 / TRANSMIT_RATE_HZ in
+# read_deck.py). Gaps between packets longer than twice this count as stalls.
+TRANSMIT_PERIOD_SEC = 0.01
+
+# --- Security Configuration ---
+# Path to the pre-shared key file (same file on both ends), or None to accept
+# unauthenticated packets.
+AUTH_KEY_FILE = None
+# Only accept packets from this transmitter IP address, or None for any.
+PINNED_SENDER_IP = None
+
+# --- Real-Time Configuration ---
+# Opt-in: pin the loop to one core, use SCHED_FIFO, mlockall and freeze the GC.
+REALTIME_MODE = False
+REALTIME_CPU = 3
+REALTIME_PRIORITY = 50
 
 def check_root_permissions():
     """Exits the script if it's not run as root."""
@@ -56,6 +90,67 @@ def init_udp_socket():
     # return the socket conexion
     return sock
 
+def init_authenticator():
+    """
+    Loads the pre-shared key, if one is configured.
+
+    Returns:
+        PacketAuthenticator: The verifier, or None if authentication is off.
+    """
+    if AUTH_KEY_FILE is None:
+        return None
+    try:
+        return PacketAuthenticator(load_key(AUTH_KEY_FILE))
+    except (OSError, ValueError) as e:
+        print(f"Error loading the authentication key: {e}")
+        sys.exit(1)
+
+def is_fresh_packet(epoch, seq, last_epoch, last_seq):
+    """
+    Tells whether an authenticated packet is newer than the last accepted one,
+    so that captured packets cannot be replayed.
+
+    A newer session epoch means the transmitter restarted. Within a session
+    the sequence number must move forward, allowing for wrap-around.
+
+    Args:
+        epoch (int): The session epoch of the packet.
+        seq (int): The sequence number of the packet.
+        last_epoch (int): The epoch of the last accepted packet, or None.
+        last_seq (int): The sequence number of the last accepted packet.
+
+    Returns:
+        bool: True if the packet should be accepted.
+    """
+    if last_epoch is None:
+        return True
+    if epoch != last_epoch:
+        return epoch > last_epoch
+    return 0 < (seq - last_seq) % 2**32 < 2**31
+
+def send_feedback(sock, addr, last_seq, last_seq_time, received, expected, authenticator=None):
+    """
+    Sends a link report to the transmitter.
+
+    Args:
+        sock (socket): The UDP socket object.
+        addr (tuple): The (ip, port) the transmitter sends from.
+        last_seq (int): The last sequence number received.
+        last_seq_time (float): When that packet was received (time.monotonic).
+        received (int): Packets received since the previous report.
+        expected (int): Packets expected since the previous report.
+        authenticator (PacketAuthenticator): Signs the report, if given.
+    """
+    hold_us = int((time.monotonic() - last_seq_time) * 1e6)
+    message = struct.pack(FEEDBACK_FORMAT, last_seq, min(hold_us, 0xFFFFFFFF),
+                          min(received, 0xFFFF), min(expected, 0xFFFF))
+    if authenticator:
+        message = authenticator.sign(message)
+    try:
+        sock.sendto(message, addr)
+    except OSError as e:
+        print(f"Error sending link report: {e}")
+
 def create_virtual_joystick():
     """
     Creates a virtual joystick. Note: L3/R3 clicks are removed as they
@@ -95,6 +190,18 @@ def main():
     check_root_permissions()
     # init_udp_socket() already binds the socket.
     sock = init_udp_socket()
+    authenticator = init_authenticator()
+    report_authenticator = authenticator.for_domain(DOMAIN_LINK_REPORT) if authenticator else None
+    expected_size = PACKET_SIZE + (authenticator.tag_size if authenticator else 0)
+
+    # Let transmitters find this ground station without any configuration.
+    responder = None
+    if DISCOVERY_ENABLED:
+        try:
+            responder = DiscoveryResponder(UDP_PORT, authenticator=authenticator)
+            responder.start()
+        except OSError as e:
+            print(f"Warning: discovery disabled: {e}")
     device = create_virtual_joystick()
     
     print(f"Listening on UDP {UDP_IP}:{UDP_PORT}...")
@@ -104,26 +211,93 @@ def main():
     last_packet_time = time.time()
     last_axes = [0] * 6
     last_buttons = [0] * 10
+    input_lost = False
+
+    # Session of the last accepted packet, for replay protection
+    last_epoch = None
+
+    # Link statistics for the reports to the transmitter
+    transmitter_addr = None
+    last_seq = None
+    last_seq_time = 0.0
+    reported_seq = None     # Last sequence number covered by a report
+    window_received = 0
+    last_feedback_time = time.monotonic()
+    stall_monitor = StallMonitor(TRANSMIT_PERIOD_SEC)
+
+    sock.settimeout(RECV_TIMEOUT_SEC)
+
+    # Startup is done, so everything allocated so far can be locked in.
+    if REALTIME_MODE:
+        enable_realtime(REALTIME_CPU, REALTIME_PRIORITY)
 
     try:
         while True:
-            sock.settimeout(0.05)
             try:
                 data, addr = sock.recvfrom(BUFFER_SIZE)
 
+                # Drop packets from unknown senders or with a bad tag.
+                if PINNED_SENDER_IP is not None and addr[0] != PINNED_SENDER_IP:
+                    data = b""
+                elif authenticator:
+                    if len(data) == expected_size:
+                        data = authenticator.verify(data) or b""
+                    else:
+                        data = b""
+                    # Drop replays of older packets the same way.
+                    if data:
+                        fields = struct.unpack(PACKET_FORMAT, data)
+                        if not is_fresh_packet(fields[18], fields[0], last_epoch, last_seq):
+                            data = b""
+
                 if len(data) == PACKET_SIZE:
-                    last_packet_time = time.time()
                     unpacked_data = struct.unpack(PACKET_FORMAT, data)
+                    seq, epoch = unpacked_data[0], unpacked_data[18]
+
+                    if epoch != last_epoch:
+                        # A new transmitter session starts a new report window.
+                        reported_seq = None
+                    last_epoch = epoch
+
+                    last_packet_time = time.time()
+                    # Idle keepalives are slow on purpose, not stalls.
+                    if unpacked_data[17] & FLAG_KEEPALIVE:
+                        stall_monitor.reset()
+                    else:
+                        stall_monitor.tick()
                     
                     # Update the last known state
                     last_axes = list(unpacked_data[1:7])
                     # Corrected the slice to read exactly 10 buttons
                     last_buttons = list(unpacked_data[7:17])
+                    input_lost = bool(unpacked_data[17] & FLAG_INPUT_LOST)
+
+                    transmitter_addr = addr
+                    last_seq = seq
+                    last_seq_time = time.monotonic()
+                    if reported_seq is None:
+                        reported_seq = last_seq - 1
+                    window_received += 1
             
             except socket.timeout:
                 pass
+
+            # Report loss and timing back so the transmitter can adapt its rate.
+            if time.monotonic() - last_feedback_time >= FEEDBACK_INTERVAL_SEC:
+                if window_received:
+                    expected = last_seq - reported_seq
+                    if not window_received <= expected <= 0xFFFF:
+                        # The transmitter restarted or the sequence wrapped.
+                        expected = window_received
+                    send_feedback(sock, transmitter_addr, last_seq, last_seq_time,
+                                  window_received, expected, report_authenticator)
+                    reported_seq = last_seq
+                window_received = 0
+                last_feedback_time = time.monotonic()
             
-            if time.time() - last_packet_time > TIMEOUT_SEC:
+            # Fail safe on a silent link, or at once if the transmitter
+            # reports that its controller is gone.
+            if input_lost or time.time() - last_packet_time > TIMEOUT_SEC:
                 axes_to_send = last_axes.copy()
                 axes_to_send[0:4] = [0] * 4  # Zero out joysticks
                 buttons_to_send = last_buttons # Keep last button states
@@ -164,7 +338,10 @@ def main():
         print("\nShutting down receiver...")
 
     finally:
+        if responder:
+            responder.close()
         sock.close()
+        print(stall_monitor.report())
         print("Socket closed and virtual device released.")
 
 if __name__ == "__main__":
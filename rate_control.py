@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""
+Adaptive transmit rate for the transmitter loop.
+
+A fixed send rate wastes airtime while the sticks are idle and is too coarse
+during aggressive manoeuvres. The transmitter keeps polling the controller at
+a fixed fast tick, and `AdaptiveRateController` decides on every tick whether
+a packet should be sent. The send rate follows two inputs:
+
+- Input activity: the faster the axes move, the closer the rate gets to the
+  cap. When nothing has changed for `IDLE_HOLD_SEC`, the rate drops to the
+  keepalive floor. A button change, or the first movement after the input
+  was idle, is sent at once instead of waiting for the next scheduled packet.
+- Link quality: the receiver reports loss and the transmitter measures RTT.
+  When either climbs past its limit the cap is cut multiplicatively, and it
+  recovers additively once the link is healthy again (AIMD).
+
+Packets are scheduled from their ideal send times rather than from the tick
+that sent the previous one, so the rate on the wire matches the chosen rate
+even though sends can only happen on polling ticks.
+
+Decisions are printed whenever the reason or the rate changes noticeably,
+together with the rate actually sent, so the latency/bandwidth trade-off can
+be tuned from the log.
+"""
+
+import time
+from collections import deque
+
+# --- Configuration Constants ---
+MIN_RATE_HZ = 10            # Keepalive floor while the input is static
+BASE_RATE_HZ = 100          # Rate for slow, steady stick movement
+MAX_RATE_HZ = 250           # Cap during aggressive manoeuvres
+IDLE_HOLD_SEC = 0.5         # Static time before dropping to the floor
+AXIS_DEADBAND = 64          # Axis changes smaller than this are noise
+FULL_SCALE_VELOCITY = 4.0   # Full stick range per second that reaches the cap
+
+LOSS_LIMIT = 0.05           # Back off above 5% loss...
+RTT_LIMIT_SEC = 0.05        # ...or above 50 ms RTT
+BACKOFF_FACTOR = 0.7        # Multiplicative decrease of the cap
+RECOVERY_STEP = 0.05        # Additive increase of the cap per good report
+MIN_LINK_SCALE = MIN_RATE_HZ / MAX_RATE_HZ
+
+SCHEDULE_TOLERANCE = 0.25   # A tick may come this fraction of a period early
+SENT_RATE_WINDOW_SEC = 1.0  # Window for the measured send rate
+
+LOG_RATE_CHANGE = 0.2       # Log rate changes larger than 20%
+AXIS_RANGE = 32767
+
+class AdaptiveRateController:
+    """Chooses the transmit rate from input activity and link quality."""
+
+    def __init__(self, min_hz=MIN_RATE_HZ, base_hz=BASE_RATE_HZ, max_hz=MAX_RATE_HZ):
+        """
+        Args:
+            min_hz (float): The keepalive floor.
+            base_hz (float): The rate for slow stick movement.
+            max_hz (float): The cap for fast stick movement.
+        """
+        self.min_hz = min_hz
+        self.base_hz = base_hz
+        self.max_hz = max_hz
+
+        self.rate_hz = base_hz
+        self.reason = "startup"
+        self.link_scale = 1.0       # Fraction of max_hz the link allows
+        self.loss = 0.0
+        self.rtt_sec = None
+
+        # Axis values and time of the last change larger than the deadband
+        self._ref_axes = None
+        self._ref_time = None
+        self._last_buttons = None
+        self._last_activity = time.monotonic()
+        self._activity_reason = "startup"
+        self._logged_rate = None
+        self._logged_reason = None
+        self._next_send = None      # Ideal time of the next scheduled packet
+
+        # Statistics for the log and the summary
+        self._start_time = self._last_activity
+        self._packets = 0
+        self._send_times = deque()  # Send times within SENT_RATE_WINDOW_SEC
+
+    def should_send(self, axes, buttons):
+        """
+        Updates the rate from the current input and decides whether a packet
+        is due. Call once per polling tick.
+
+        Args:
+            axes (list): The current axis values.
+            buttons (list): The current button values.
+
+        Returns:
+            bool: True if a packet should be sent now.
+        """
+        now = time.monotonic()
+        velocity = 0.0
+        buttons_changed = False
+
+        if self._ref_axes is None:
+            self._ref_axes = list(axes)
+            self._ref_time = now
+        else:
+            # Measured against the last significant change, so that slow
+            # movements at high rates are not lost in the deadband.
+            largest_step = max(abs(a - b) for a, b in zip(axes, self._ref_axes))
+            if largest_step > AXIS_DEADBAND:
+                velocity = largest_step / AXIS_RANGE / max(now - self._ref_time, 1e-3)
+                self._ref_axes = list(axes)
+                self._ref_time = now
+            buttons_changed = buttons != self._last_buttons
+
+        self._last_buttons = list(buttons)
+
+        # 1. Rate wanted by the input activity
+        if buttons_changed:
+            wanted, reason = self.max_hz, "button"
+        elif velocity > 0:
+            fraction = min(1.0, velocity / FULL_SCALE_VELOCITY)
+            wanted, reason = self.base_hz + (self.max_hz - self.base_hz) * fraction, "motion"
+        elif now - self._last_activity < IDLE_HOLD_SEC:
+            # Keep the current rate for a moment; sticks often pause briefly.
+            wanted, reason = max(self.rate_hz, self.base_hz), self._activity_reason
+        else:
+            wanted, reason = self.min_hz, "idle"
+
+        # Leaving idle must not wait for the next keepalive.
+        wake_up = self._activity_reason == "idle" and reason != "idle"
+
+        if buttons_changed or velocity > 0:
+            self._last_activity = now
+        self._activity_reason = reason
+
+        # 2. Cap imposed by the link
+        cap = max(self.min_hz, self.max_hz * self.link_scale)
+        if wanted > cap:
+            wanted, reason = cap, f"{reason}, link-limited"
+
+        self.rate_hz = max(self.min_hz, wanted)
+        self.reason = reason
+        self._log_decision(velocity, now)
+
+        period = 1 / self.rate_hz
+        if buttons_changed or wake_up or self._next_send is None:
+            # Send now and start a new schedule from here.
+            self._next_send = now
+        else:
+            # A higher rate takes effect at once, not after the old period.
+            self._next_send = min(self._next_send, now + period)
+
+        if now < self._next_send - SCHEDULE_TOLERANCE * period:
+            return False
+
+        # Advance from the ideal send time, not from this tick, so the
+        # tick granularity does not round the rate down. After a gap the
+        # schedule restarts instead of sending a burst to catch up.
+        self._next_send = max(self._next_send + period, now)
+        self._packets += 1
+        self._send_times.append(now)
+        while now - self._send_times[0] > SENT_RATE_WINDOW_SEC:
+            self._send_times.popleft()
+        return True
+
+    def sent_hz(self, now=None):
+        """Returns the rate actually sent over the last SENT_RATE_WINDOW_SEC."""
+        if now is None:
+            now = time.monotonic()
+        window = min(SENT_RATE_WINDOW_SEC, now - self._start_time)
+        recent = sum(1 for t in self._send_times if now - t <= SENT_RATE_WINDOW_SEC)
+        return recent / window if window > 0 else 0.0
+
+    def on_feedback(self, loss, rtt_sec):
+        """
+        Adjusts the link cap from a receiver report.
+
+        Args:
+            loss (float): The fraction of packets lost since the last report.
+            rtt_sec (float): The measured round-trip time, or None.
+        """
+        self.loss = loss
+        self.rtt_sec = rtt_sec
+        congested = loss > LOSS_LIMIT or (rtt_sec is not None and rtt_sec > RTT_LIMIT_SEC)
+
+        if congested:
+            self.link_scale = max(MIN_LINK_SCALE, self.link_scale * BACKOFF_FACTOR)
+        else:
+            self.link_scale = min(1.0, self.link_scale + RECOVERY_STEP)
+
+    def _log_decision(self, velocity, now):
+        """Prints the decision if the reason or the rate changed noticeably."""
+        rate_changed = (self._logged_rate is None or
+                        abs(self.rate_hz - self._logged_rate) > LOG_RATE_CHANGE * self._logged_rate)
+        if not rate_changed and self.reason == self._logged_reason:
+            return
+
+        rtt = f"{self.rtt_sec * 1000:.1f} ms" if self.rtt_sec is not None else "n/a"
+        print(f"[rate] {self.rate_hz:6.1f} Hz ({self.reason}) sent={self.sent_hz(now):.1f} Hz "
+              f"velocity={velocity:.2f}/s loss={self.loss:.1%} rtt={rtt} "
+              f"link cap={max(self.min_hz, self.max_hz * self.link_scale):.0f} Hz")
+        self._logged_rate = self.rate_hz
+        self._logged_reason = self.reason
+
+    def report(self):
+        """Returns a one-line human readable summary."""
+        elapsed = max(time.monotonic() - self._start_time, 1e-9)
+        return (f"Adaptive rate: {self._packets} packets sent in {elapsed:.1f} s "
+                f"(average {self._packets / elapsed:.1f} Hz on the wire, fixed rate "
+                f"would be {self.base_hz:g} Hz)")
@@ -13,6 +13,7 @@ import sys
 import socket
 import time
 import struct
+import select
 import os
 
 # --- Assumes your main script is named steamdeck_input_api.py ---
@@ -23,6 +24,11 @@ except ImportError:
     print("Please ensure 'steamdeck_input_api.py' is in the same directory.")
     sys.exit(1)
 
+from realtime import enable_realtime, StallMonitor
+from packet_auth import PacketAuthenticator, load_key, DOMAIN_LINK_REPORT
+from discovery import GroundStationFinder, DISCOVERY_GROUP, DISCOVERY_PORT
+from rate_control import AdaptiveRateController
+
 def check_root_permissions():
     """Exits the script if it's not run as root."""
     if os.geteuid() != 0:
@@ -31,27 +37,81 @@ def check_root_permissions():
         sys.exit(1)
 
 # --- Network Configuration ---
-# The destination IP address for the UDP packets.
-# Change this to the IP address of the receiving computer.UDP_IP = "100.121.21.44"
-UDP_IP = "127.0.0.1"
-UDP_PORT = 5004
+# The destination IP address for the UDP packets. Leave it as None to find
+# the ground station automatically (see discovery.py); this needs a link
+# that carries multicast. Otherwise, e.g. over Tailscale, set it to the IP
+# address of the receiving computer, e.g. "100.121.21.44".
+UDP_IP = None
+UDP_PORT = 5004             # Only used together with a fixed UDP_IP
+DISCOVERY_TIMEOUT_SEC = 5.0   # Give up discovery after this long (None = never)
+
+# --- Security Configuration ---
+# Path to the pre-shared key file (same file on both ends), or None to send
+# unauthenticated packets.
+AUTH_KEY_FILE = None
 
 # --- Performance Configuration ---
 TRANSMIT_RATE_HZ = 100  # Increased rate for lower latency
 TRANSMIT_DELAY_SEC = 1 / TRANSMIT_RATE_HZ
+# Vary the rate with stick activity and link quality (see rate_control.py).
+# TRANSMIT_RATE_HZ is then the rate for slow, steady movement.
+ADAPTIVE_RATE = True
+# With ADAPTIVE_RATE, the controller is still polled at this fixed rate, so
+# input changes are never delayed by a low send rate. It is also the send
+# rate cap.
+POLL_RATE_HZ = 250
+POLL_DELAY_SEC = 1 / POLL_RATE_HZ
+
+# --- Real-Time Configuration ---
+# Opt-in: pin the loop to one core, use SCHED_FIFO, mlockall and freeze the GC.
+REALTIME_MODE = False
+REALTIME_CPU = 3
+REALTIME_PRIORITY = 50
 
 # --- Binary Protocol Definition ---
 # !: Network byte order (standard)
 # L: Sequence number (unsigned long, 4 bytes)
 # h: 6 axes (short, 2 bytes each)
 # B: 10 buttons (unsigned char, 1 byte each)
-PACKET_FORMAT = "!LhhhhhhBBBBBBBBBB"
+# B: flags (unsigned char, 1 byte)
+# Q: session epoch (unsigned long long, 8 bytes). Milliseconds since the Unix
+#    epoch at transmitter start, so the receiver can tell a restarted
+#    transmitter from a replay of an older session.
+PACKET_FORMAT = "!LhhhhhhBBBBBBBBBBBQ"
+
+# Flag bits
+FLAG_INPUT_LOST = 0x01  # The controller is gone; the receiver must fail safe
+FLAG_KEEPALIVE = 0x02   # Sent below TRANSMIT_RATE_HZ; the gap before it is not a stall
+
+# Link report sent back by the receiver
+# L: Last sequence number received
+# L: Microseconds between receiving that packet and sending the report
+# H: Packets received since the previous report
+# H: Packets expected since the previous report
+FEEDBACK_FORMAT = "!LLHH"
+FEEDBACK_SIZE = struct.calcsize(FEEDBACK_FORMAT)
+SEND_TIME_SLOTS = 256   # Send times remembered for RTT measurement
 
 def init_udp_socket():
     # Create the UDP socket
     # ipv4 values of Ip and Datagram(udp) mode
     return socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
+def init_authenticator():
+    """
+    Loads the pre-shared key, if one is configured.
+
+    Returns:
+        PacketAuthenticator: The signer, or None if authentication is off.
+    """
+    if AUTH_KEY_FILE is None:
+        return None
+    try:
+        return PacketAuthenticator(load_key(AUTH_KEY_FILE))
+    except (OSError, ValueError) as e:
+        print(f"Error loading the authentication key: {e}")
+        sys.exit(1)
+
 def gather_controller_data(joystick):
     """
     Gathers the 16 specific channels from the joystick object
@@ -94,27 +154,133 @@ def gather_controller_data(joystick):
 
     return axes, buttons
 
-def pack_and_send_data(sock, seq_num, axes, buttons):
+def start_discovery(authenticator):
+    """
+    Starts searching for the ground station in the background, so that the
+    search overlaps with SDL initialization.
+
+    Returns:
+        GroundStationFinder: The running search, or None if UDP_IP is set.
+    """
+    if UDP_IP is not None:
+        return None
+
+    print("Searching for a ground station...")
+    finder = GroundStationFinder(DISCOVERY_TIMEOUT_SEC, authenticator)
+    finder.start()
+    return finder
+
+def find_destination(finder):
+    """
+    Returns the (ip, port) to transmit to, waiting for the discovery started
+    by `start_discovery()` if UDP_IP is None.
+
+    Raises:
+        RuntimeError: If no ground station answered in time.
+    """
+    if finder is None:
+        return (UDP_IP, UDP_PORT)
+
+    finder.join()
+    found = finder.result
+    if found is None:
+        raise RuntimeError(
+            f"No ground station answered on multicast group {DISCOVERY_GROUP}:{DISCOVERY_PORT} "
+            f"within {DISCOVERY_TIMEOUT_SEC} s. If the link does not carry multicast "
+            f"(e.g. Tailscale), set UDP_IP in read_deck.py to the receiver's address.")
+
+    destination, name, rtt = found
+    print(f"Found ground station '{name}' (RTT {rtt * 1000:.2f} ms).")
+    return destination
+
+def pack_and_send_data(sock, destination, epoch, seq_num, axes, buttons, flags=0, authenticator=None):
     """
     Packs the collected data into a binary message and sends it via UDP.
 
     Args:
         sock (socket): The UDP socket object.
+        destination (tuple): The (ip, port) of the receiver.
+        epoch (int): The session epoch of this transmitter run.
         seq_num (int): The current packet sequence number.
         axes (list): The list of 6 axis values.
         buttons (list): The list of 1 button values.
+        flags (int): A combination of the FLAG_* bits.
+        authenticator (PacketAuthenticator): Signs the packet, if given.
     """
     try:
         # Pack the data into a binary message according to the defined format.
         # The '*' operator unpacks the lists into individual arguments.
-        message = struct.pack(PACKET_FORMAT, seq_num, *axes, *buttons)
+        message = struct.pack(PACKET_FORMAT, seq_num, *axes, *buttons, flags, epoch)
+        if authenticator:
+            message = authenticator.sign(message)
         
         # Send the data over the network.
-        sock.sendto(message, (UDP_IP, UDP_PORT))
+        sock.sendto(message, destination)
 
     except Exception as e:
         print(f"Error sending data: {e}")
 
+def read_feedback(sock, destination, authenticator, send_times, rate_controller):
+    """
+    Reads all pending link reports from the receiver without blocking and
+    passes the loss and RTT to the rate controller. Call it as soon as the
+    socket is readable (see `wait_for_next_tick()`), because the RTT is taken
+    when the report is read.
+
+    Args:
+        sock (socket): The non-blocking UDP socket object.
+        destination (tuple): The (ip, port) of the receiver.
+        authenticator (PacketAuthenticator): Verifies the reports, if given.
+        send_times (list): (sequence number, send time) per slot.
+        rate_controller (AdaptiveRateController): Receives the link quality.
+    """
+    expected_size = FEEDBACK_SIZE + (authenticator.tag_size if authenticator else 0)
+    while True:
+        try:
+            data, addr = sock.recvfrom(1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            # e.g. ICMP port unreachable while the receiver is down
+            continue
+
+        if addr[0] != destination[0] or len(data) != expected_size:
+            continue
+        if authenticator:
+            data = authenticator.verify(data)
+            if data is None:
+                continue
+
+        last_seq, hold_us, received, expected = struct.unpack(FEEDBACK_FORMAT, data)
+        loss = 1 - received / expected if expected else 0.0
+
+        rtt = None
+        slot_seq, sent_at = send_times[last_seq % SEND_TIME_SLOTS]
+        if slot_seq == last_seq:
+            rtt = time.monotonic() - sent_at - hold_us / 1e6
+        rate_controller.on_feedback(max(loss, 0.0), rtt)
+
+def wait_for_next_tick(sock, deadline, destination, authenticator, send_times, rate_controller):
+    """
+    Waits until `deadline` (time.monotonic), handling link reports the moment
+    they arrive so that the wait is never counted as RTT.
+
+    Args:
+        sock (socket): The non-blocking UDP socket object.
+        deadline (float): When the next polling tick is due.
+        destination (tuple): The (ip, port) of the receiver.
+        authenticator (PacketAuthenticator): Verifies the reports, if given.
+        send_times (list): (sequence number, send time) per slot.
+        rate_controller (AdaptiveRateController): Receives the link quality.
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        readable, _, _ = select.select([sock], [], [], remaining)
+        if readable:
+            read_feedback(sock, destination, authenticator, send_times, rate_controller)
+
 def main():
     """
     Main execution function. Initializes the joystick and the network socket,
@@ -123,34 +289,85 @@ def main():
     check_root_permissions()
     # Create the udp socket
     sock = init_udp_socket()
+    authenticator = init_authenticator()
+    report_authenticator = authenticator.for_domain(DOMAIN_LINK_REPORT) if authenticator else None
     # Initialize variables
     joystick = None
     sequence_number = 0
+    session_epoch = time.time_ns() // 1_000_000
+    was_connected = True
+    if ADAPTIVE_RATE:
+        rate_controller = AdaptiveRateController(base_hz=TRANSMIT_RATE_HZ, max_hz=POLL_RATE_HZ)
+        stall_monitor = StallMonitor(POLL_DELAY_SEC)
+    else:
+        rate_controller = None
+        stall_monitor = StallMonitor(TRANSMIT_DELAY_SEC)
+    send_times = [(None, 0.0)] * SEND_TIME_SLOTS
 
     try:
-        # 1. Create an instance of the Joystick class.
+        # 1. Look for the ground station while SDL starts up.
+        finder = start_discovery(authenticator)
+
+        # 2. Create an instance of the Joystick class.
         # This handles all the SDL initialization and setup.
         joystick = Joystick()
-        print(f"Transmitting joystick data to {UDP_IP}:{UDP_PORT}...")
+        destination = find_destination(finder)
+        print(f"Transmitting joystick data to {destination[0]}:{destination[1]}...")
         print("Press Ctrl+C to stop.")
+
+        # Link reports from the receiver are read between packets.
+        sock.setblocking(False)
+
+        # Startup is done, so everything allocated so far can be locked in.
+        if REALTIME_MODE:
+            enable_realtime(REALTIME_CPU, REALTIME_PRIORITY)
         
-        # 2. Start the main transmission loop.
+        # 3. Start the main transmission loop.
+        next_tick = time.monotonic()
         while True:
+            stall_monitor.tick()
+
             # ALWAYS call .update() once per loop to poll for new events.
             joystick.update()
 
             # Get the specific channel to send
             axes, buttons = gather_controller_data(joystick)
 
-            # Pack and send the data over the network.
-            pack_and_send_data(sock, sequence_number, axes, buttons)
+            # With the adaptive rate, only send when a packet is due, but
+            # always send at once if the controller came or went.
+            send = True
+            if rate_controller:
+                send = (rate_controller.should_send(axes, buttons) or
+                        joystick.connected != was_connected)
+
+            if send:
+                # Tell the receiver right away if the controller went away.
+                flags = 0 if joystick.connected else FLAG_INPUT_LOST
+                if rate_controller and rate_controller.rate_hz < TRANSMIT_RATE_HZ:
+                    flags |= FLAG_KEEPALIVE
+
+                # Pack and send the data over the network.
+                pack_and_send_data(sock, destination, session_epoch, sequence_number, axes, buttons, flags, authenticator)
+                send_times[sequence_number % SEND_TIME_SLOTS] = (sequence_number, time.monotonic())
+
+                # Report how long the first valid packet took after a re-plug.
+                if joystick.connected and not was_connected:
+                    print(f"Controller back, first valid packet sent "
+                          f"{joystick.ms_since_reconnect()} ms after re-plug.")
+                was_connected = joystick.connected
 
-            # Increment sequence number for the next packet.
-            # It wraps around automatically at the max value for an unsigned long
-            sequence_number = (sequence_number + 1) % 4294967295
+                # Increment sequence number for the next packet.
+                # It wraps around automatically at the max value for an unsigned long
+                sequence_number = (sequence_number + 1) % 4294967295
 
             # Wait a moment to maintain the desired transmission rate.
-            time.sleep(TRANSMIT_DELAY_SEC)
+            if rate_controller:
+                # Fixed polling tick; never try to catch up on missed ticks.
+                next_tick = max(next_tick + POLL_DELAY_SEC, time.monotonic())
+                wait_for_next_tick(sock, next_tick, destination, report_authenticator,
+                                   send_times, rate_controller)
+            else:
+                time.sleep(TRANSMIT_DELAY_SEC)
 
     # Handle errors
     except (RuntimeError, KeyboardInterrupt) as e:
@@ -162,6 +379,9 @@ def main():
         if joystick:
             joystick.close()
         sock.close()
+        print(stall_monitor.report())
+        if rate_controller:
+            print(rate_controller.report())
         print("Socket closed.")
 
 # Main program
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+"""
+Optional real-time tuning for the transmitter and receiver loops.
+
+Python's garbage collector and the rest of the Steam Deck's desktop workload
+can both stall the `while True` loops for several milliseconds. This module
+groups the knobs that reduce that jitter:
+
+- pin every thread of the process to a single CPU core,
+- request the `SCHED_FIFO` real-time scheduler (needs root),
+- lock all memory pages with `mlockall` so they are never paged out,
+- freeze (and optionally disable) the cyclic garbage collector.
+
+It also provides `StallMonitor`, a tiny helper that records the worst gap
+between two iterations of a loop so the effect can be measured.
+"""
+
+import gc
+import os
+import time
+
+# --- Configuration Constants ---
+DEFAULT_CPU = 3             # Last core of the Steam Deck / Raspberry Pi 4
+DEFAULT_PRIORITY = 50       # SCHED_FIFO priority (1 = lowest, 99 = highest)
+
+# Flags from <sys/mman.h>
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+def _thread_ids():
+    """
+    Returns the IDs of all threads of the current process.
+
+    The scheduler calls below only affect the thread whose ID they get, so
+    they are applied to every thread, including the ones started by SDL and
+    the discovery responder. Threads started later inherit the settings.
+    """
+    try:
+        return [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        # No /proc: only the calling thread can be changed.
+        return [0]
+
+def pin_to_cpu(cpu):
+    """Restricts all threads of the current process to a single CPU core."""
+    for tid in _thread_ids():
+        os.sched_setaffinity(tid, {cpu})
+
+def set_fifo_priority(priority):
+    """Switches all threads of the current process to SCHED_FIFO."""
+    for tid in _thread_ids():
+        os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(priority))
+
+def lock_memory():
+    """Locks all current and future memory pages of the process in RAM."""
+    # ctypes is only needed here, so it is not imported at startup.
+    import ctypes
+    import ctypes.util
+
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        raise OSError("libc not found, cannot call mlockall")
+
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"mlockall failed: {os.strerror(errno)}")
+
+def freeze_gc(disable=True):
+    """
+    Moves every object allocated during startup out of the GC's reach.
+
+    Args:
+        disable (bool): Also disable the cyclic collector entirely. The hot
+            loops do not create reference cycles, so reference counting is
+            enough to free their garbage.
+    """
+    gc.collect()
+    gc.freeze()
+    if disable:
+        gc.disable()
+
+def enable_realtime(cpu=DEFAULT_CPU, priority=DEFAULT_PRIORITY, disable_gc=True):
+    """
+    Applies all real-time settings. Call it once, after startup is complete
+    and right before entering the main loop.
+
+    A failing step (e.g. not running as root, or a core that does not exist)
+    only prints a warning so the loop can still run without it.
+
+    Args:
+        cpu (int): The core to pin the process to, or None to skip pinning.
+        priority (int): The SCHED_FIFO priority to request.
+        disable_gc (bool): Disable the cyclic GC after freezing it.
+
+    Returns:
+        list: The names of the steps that were applied successfully.
+    """
+    steps = []
+    if cpu is not None:
+        steps.append(("cpu pinning", lambda: pin_to_cpu(cpu)))
+    steps.append(("SCHED_FIFO", lambda: set_fifo_priority(priority)))
+    steps.append(("mlockall", lock_memory))
+
+    applied = []
+    for name, step in steps:
+        try:
+            step()
+            applied.append(name)
+        except (OSError, ValueError) as e:
+            print(f"Warning: real-time {name} not applied: {e}")
+
+    # The GC is frozen last so that nothing allocated above is left behind.
+    freeze_gc(disable=disable_gc)
+    applied.append("gc disabled" if disable_gc else "gc frozen")
+
+    print(f"Real-time mode enabled: {', '.join(applied)}")
+    return applied
+
+class StallMonitor:
+    """Records the worst gap between consecutive iterations of a loop."""
+
+    def __init__(self, expected_period_sec):
+        """
+        Args:
+            expected_period_sec (float): The intended duration of one loop
+                iteration. Gaps longer than twice this value count as stalls.
+        """
+        self.expected_period_sec = expected_period_sec
+        self.worst_gap_sec = 0.0
+        self.stall_count = 0
+        self.iterations = 0
+        self._last_tick = None
+
+    def tick(self):
+        """Call once per loop iteration."""
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            gap = now - self._last_tick
+            if gap > self.worst_gap_sec:
+                self.worst_gap_sec = gap
+            if gap > 2 * self.expected_period_sec:
+                self.stall_count += 1
+        self._last_tick = now
+        self.iterations += 1
+
+    def reset(self):
+        """Forgets the last tick, so the next gap is not measured."""
+        self._last_tick = None
+
+    def report(self):
+        """Returns a one-line human readable summary."""
+        return (f"Worst loop stall: {self.worst_gap_sec * 1000:.2f} ms "
+                f"(expected {self.expected_period_sec * 1000:.2f} ms, "
+                f"{self.stall_count} stalls in {self.iterations} iterations)")
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+A live terminal dashboard that shows the state of the STEAM DECK controller.
+
+This script uses the `Joystick` class from `steamdeck_input_api.py` to read the
+controller and `rich` to render every group of inputs in its own panel. It is
+kept separate from the Joystick API so that headless scripts do not have to
+import `rich`.
+"""
+
+import sdl2
+from rich.live import Live
+from rich.table import Table
+from rich.columns import Columns
+from rich.panel import Panel
+
+from steamdeck_input_api import Joystick
+
+# --- Configuration Constants ---
+REFRESH_RATE_HZ = 100        # Target refresh rate for the display
+REFRESH_DELAY_MS = int(1000 / REFRESH_RATE_HZ) # Calculate delay in milliseconds
+
+def generate_dashboard_layout(joystick):
+    """
+    Generates a rich layout object to be displayed by Live.
+    This function NO LONGER prints to the screen. It just builds the layout.
+    """
+    def create_table(data_dict, title):
+        table = Table(title=title, expand=True, show_header=False, border_style="dim")
+        table.add_column("Item", style="cyan", no_wrap=True)
+        table.add_column("Value", justify="right")
+        for item, value in data_dict.items():
+            if isinstance(value, int) and value in (0, 1):
+                state = "[bold green]Pressed[/]" if value else "[red]Off[/]"
+                table.add_row(item, state)
+            else:
+                color = "green" if value > 1000 else "red" if value < -1000 else "white"
+                table.add_row(item, f"[{color}]{value:+6d}[/]")
+        return Panel(table, title=f"[bold cyan]{title}[/]", border_style="cyan")
+
+    # --- Use the properties to create each panel ---
+    face_button_panel = create_table(joystick.face_buttons, "Face Buttons")
+    dpad_panel = create_table(joystick.dpad_state, "D-Pad")
+    shoulder_panel = create_table(joystick.shoulder_state, "Shoulders")
+    joystick_panel = create_table(joystick.joystick_state, "Joysticks")
+    back_button_panel = create_table(joystick.back_buttons, "Back Grips")
+
+    left_column = Columns([face_button_panel, dpad_panel])
+    right_column = Columns([shoulder_panel, back_button_panel])
+
+    return Columns([left_column, joystick_panel, right_column])
+
+def main():
+    """Main execution function."""
+    joystick = None
+    try:
+        # Create an instance of our new Joystick class
+        joystick = Joystick()
+
+        with Live(generate_dashboard_layout(joystick), screen=True, vertical_overflow="visible") as live:
+            # Main application loop
+            while True:
+                # 1. Update the joystick state by polling events
+                joystick.update()
+
+                # 2. Display the data using our modular functions
+                live.update(generate_dashboard_layout(joystick))
+
+                # 3. Wait a moment
+                sdl2.SDL_Delay(REFRESH_DELAY_MS)
+
+    except (RuntimeError, KeyboardInterrupt) as e:
+        print(f"ERROR: {e}")
+    finally:
+        if joystick:
+            joystick.close()
+
+if __name__ == "__main__":
+    main()
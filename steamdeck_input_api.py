@@ -6,23 +6,23 @@ This script defines a `Joystick` class that encapsulates SDL initialization,
 event polling, and state management. It provides a clean API with specific
 "getter" methods for different parts of the controller, making it highly
 reusable for other developers.
+
+This module does not depend on `rich`, so headless users such as
+`read_deck.py` start quickly. The live dashboard lives in
+`steamdeck_dashboard.py` and is only imported when this file is run directly.
 """
 
-import sys
-import os
 import sdl2
-from rich.live import Live
-from rich.table import Table
-from rich.columns import Columns
-from rich.panel import Panel
 
 # --- Configuration Constants ---
 # Note: These are common values for a Steam Deck. Adjust for your controller.
 JOYSTICK_INDEX = 0          # The joystick to use (0 is the first one found)
 NUM_AXES_TO_TRACK = 6       # Number of axes to monitor (Steam Deck has 6)
 NUM_BUTTONS_TO_TRACK = 20   # Number of buttons to monitor (covers back buttons)
-REFRESH_RATE_HZ = 100        # Target refresh rate for the display
-REFRESH_DELAY_SEC = int(1 / REFRESH_RATE_HZ) # Calculate delay in seconds
+
+# Joystick events the API never reads. They are dropped at the SDL level so
+# they do not have to be polled and discarded in Python.
+IGNORED_EVENT_TYPES = (sdl2.SDL_JOYBALLMOTION,)
 
 class Joystick:
     """A class to manage and read data from an SDL2 joystick."""
@@ -37,18 +37,35 @@ class Joystick:
             num_buttons (int): The number of buttons to track.
         """
         self._joystick = None
+        self._instance_id = None
+        self._guid = None
         self._initialize_sdl()
         self._open_joystick(index)
 
+        # Hotplug state. `connected` goes False when the device disappears
+        # and True again once the same device (by GUID) has been reopened.
+        self.connected = True
+        self.reconnected_at_ticks = None  # SDL ticks of the last re-plug
+
         # Master state dictionaries that hold the real-time data
         self.axis_values = {i: 0 for i in range(num_axes)}
         self.button_values = {i: 0 for i in range(num_buttons)}
 
     def _initialize_sdl(self):
-        """Initializes the SDL joystick subsystem."""
-        if sdl2.SDL_Init(sdl2.SDL_INIT_JOYSTICK) < 0:
+        """
+        Initializes only the SDL joystick subsystem (plus the event queue it
+        depends on). Video, audio and the game controller mapping database are
+        never loaded.
+        """
+        # No window exists, so joystick events must be delivered regardless
+        # of focus.
+        sdl2.SDL_SetHint(sdl2.SDL_HINT_JOYSTICK_ALLOW_BACKGROUND_EVENTS, b"1")
+        if sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_JOYSTICK) < 0:
             raise RuntimeError(f"SDL Init Error: {sdl2.SDL_GetError().decode()}")
 
+        for event_type in IGNORED_EVENT_TYPES:
+            sdl2.SDL_EventState(event_type, sdl2.SDL_IGNORE)
+
     def _open_joystick(self, index):
         """Opens the physical joystick device."""
         if sdl2.SDL_NumJoysticks() < 1:
@@ -58,14 +75,66 @@ class Joystick:
         if not self._joystick:
             raise RuntimeError(f"Failed to open joystick {index}: {sdl2.SDL_GetError().decode()}")
 
+        # Remember which device this is, so it can be found again after a
+        # suspend/resume or when Steam Input reassigns it.
+        self._instance_id = sdl2.SDL_JoystickInstanceID(self._joystick)
+        self._guid = bytes(sdl2.SDL_JoystickGetGUID(self._joystick).data)
+
         sdl2.SDL_JoystickEventState(sdl2.SDL_ENABLE)
         print(f"Opened: {sdl2.SDL_JoystickName(self._joystick).decode()}")
 
+    def _handle_device_removed(self, instance_id):
+        """Drops the handle of a device that went away and clears its state."""
+        if instance_id != self._instance_id:
+            return
+
+        sdl2.SDL_JoystickClose(self._joystick)
+        self._joystick = None
+        self._instance_id = None
+        self.connected = False
+
+        # Never keep reporting the last stick positions of a dead device.
+        for axis in self.axis_values:
+            self.axis_values[axis] = 0
+        for button in self.button_values:
+            self.button_values[button] = 0
+        print("Joystick removed, waiting for it to come back...")
+
+    def _handle_device_added(self, device_index, timestamp):
+        """Reopens the original device when it is plugged in again."""
+        if self.connected:
+            # SDL also reports the devices present at startup; ignore them.
+            return
+        if bytes(sdl2.SDL_JoystickGetDeviceGUID(device_index).data) != self._guid:
+            return
+
+        try:
+            self._open_joystick(device_index)
+        except RuntimeError as e:
+            print(f"Failed to reopen joystick: {e}")
+            return
+
+        self.connected = True
+        self.reconnected_at_ticks = timestamp
+
+    def ms_since_reconnect(self):
+        """
+        Returns the milliseconds elapsed since the device was last plugged
+        back in, or None if it has never been reconnected.
+        """
+        if self.reconnected_at_ticks is None:
+            return None
+        return sdl2.SDL_GetTicks() - self.reconnected_at_ticks
+
     def update(self):
         """
         This is the core polling method. It must be called once per frame.
         It processes all pending SDL events and updates the internal state.
 
+        It also handles hotplug events: when the device is removed, all
+        values are reset and `connected` becomes False; when a device with
+        the same GUID is added again, it is reopened without restarting SDL.
+
         Returns:
             bool: False if a quit event was received, True otherwise.
         """
@@ -94,6 +163,12 @@ class Joystick:
                 self.axis_values[6] = hat_x
                 self.axis_values[7] = hat_y
 
+            # Hotplug: the device went away or (re)appeared
+            elif event.type == sdl2.SDL_JOYDEVICEREMOVED:
+                self._handle_device_removed(event.jdevice.which)
+            elif event.type == sdl2.SDL_JOYDEVICEADDED:
+                self._handle_device_added(event.jdevice.which, event.jdevice.timestamp)
+
             # Check for Quit event
             elif event.type == sdl2.SDL_QUIT:
                 # If the window is closed, we should exit gracefully.
@@ -261,63 +336,12 @@ class Joystick:
         if self._joystick:
             sdl2.SDL_JoystickClose(self._joystick)
             self._joystick = None
+        sdl2.SDL_QuitSubSystem(sdl2.SDL_INIT_JOYSTICK)
         sdl2.SDL_Quit()
         print("Joystick closed and SDL resources released.")
 
-def generate_dashboard_layout(joystick):
-    """
-    Generates a rich layout object to be displayed by Live.
-    This function NO LONGER prints to the screen. It just builds the layout.
-    """
-    def create_table(data_dict, title):
-        table = Table(title=title, expand=True, show_header=False, border_style="dim")
-        table.add_column("Item", style="cyan", no_wrap=True)
-        table.add_column("Value", justify="right")
-        for item, value in data_dict.items():
-            if isinstance(value, int) and value in (0, 1):
-                state = "[bold green]Pressed[/]" if value else "[red]Off[/]"
-                table.add_row(item, state)
-            else:
-                color = "green" if value > 1000 else "red" if value < -1000 else "white"
-                table.add_row(item, f"[{color}]{value:+6d}[/]")
-        return Panel(table, title=f"[bold cyan]{title}[/]", border_style="cyan")
-
-    # --- Use the properties to create each panel ---
-    face_button_panel = create_table(joystick.face_buttons, "Face Buttons")
-    dpad_panel = create_table(joystick.dpad_state, "D-Pad")
-    shoulder_panel = create_table(joystick.shoulder_state, "Shoulders")
-    joystick_panel = create_table(joystick.joystick_state, "Joysticks")
-    back_button_panel = create_table(joystick.back_buttons, "Back Grips")
-    
-    left_column = Columns([face_button_panel, dpad_panel])
-    right_column = Columns([shoulder_panel, back_button_panel])
-    
-    return Columns([left_column, joystick_panel, right_column])
-
-def main():
-    """Main execution function."""
-    joystick = None
-    try:
-        # Create an instance of our new Joystick class
-        joystick = Joystick()
-
-        with Live(generate_dashboard_layout(joystick), screen=True, vertical_overflow="visible") as live:
-            # Main application loop
-            while True:
-                # 1. Update the joystick state by polling events
-                joystick.update()
-
-                # 2. Display the data using our modular functions
-                live.update(generate_dashboard_layout(joystick))
-
-                # 3. Wait a moment
-                sdl2.SDL_Delay(REFRESH_DELAY_SEC)
-
-    except (RuntimeError, KeyboardInterrupt) as e:
-        print(f"ERROR: {e}")
-    finally:
-        if joystick:
-            joystick.close()
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Imported here so that `import steamdeck_input_api` never pulls in rich.
+    from steamdeck_dashboard import main
+    main()
+